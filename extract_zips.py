@@ -75,9 +75,10 @@ def extract_and_organize(zip_path: Path):
 
                 # Determine destination
                 if ext in DATA_EXTENSIONS:
-                    has_data_files = True
-                    if not data_dir.exists():
-                        data_dir.mkdir(parents=True, exist_ok=True)
+                    # Create Data subfolder once, on the first data file
+                    if not has_data_files:
+                        data_dir.mkdir(exist_ok=True)
+                        has_data_files = True
                     dest = data_dir / filename
                 else:
                     dest = target_dir / filename
@@ -4,8 +4,16 @@
 import json
 import os
 import re
+import sys
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 DOCS_DIR = Path(__file__).parent / "documents"
 OUTPUT_JSON = Path(__file__).parent / "toc.json"
 OUTPUT_MD = Path(__file__).parent / "toc.md"
@@ -52,15 +60,66 @@ STUDY_CONTENT_ORDER = {
     "DSMB-SSR1": 7,
 }
 
+# Entries never included in the TOC (VCS, OS and tooling junk). Anything
+# starting with "." is skipped as well, so hidden subtrees are never walked.
+IGNORED_NAMES = {
+    "metadata.json",
+    "Thumbs.db",
+    "desktop.ini",
+    "__pycache__",
+    "node_modules",
+}
+
+# Leading study number in folder names (101-SAD, 202, 301, etc.)
+STUDY_NUM_RE = re.compile(r'^(\d+)')
+
+# A directory waiting to be scanned; items is its (empty) children list and
+# link_parents the real paths of the directories whose symlinks led here
+Folder = namedtuple("Folder", ["path", "rel_path", "inherited", "metadata", "items",
+                               "link_parents"])
+
+class Node:
+    """A file or folder in the TOC tree."""
+    # __slots__ instead of a dict per entry keeps large trees small in memory;
+    # optional fields stay None and are left out of toc.json
+    __slots__ = ("name", "type", "path", "children", "title", "summary", "tags", "drug")
+
+    def __init__(self, name, node_type, path, children=None):
+        self.name = name
+        self.type = node_type
+        self.path = path
+        self.children = children
+        self.title = None
+        self.summary = None
+        self.tags = None
+        self.drug = None
+
+    def to_dict(self):
+        """Return the toc.json representation (children stay as Nodes)."""
+        d = {"name": self.name, "type": self.type, "path": self.path}
+        if self.children is not None:
+            d["children"] = self.children
+        if self.title is not None:
+            d["title"] = self.title
+        if self.summary is not None:
+            d["summary"] = self.summary
+        if self.tags is not None:
+            d["tags"] = self.tags
+        if self.drug is not None:
+            d["drug"] = self.drug
+        return d
+
 def get_file_type(filename):
     """Return file type based on extension."""
-    ext = Path(filename).suffix.lower()
-    return ext[1:] if ext else "unknown"
+    # os.path rather than Path: this runs once per file in the scan
+    ext = os.path.splitext(filename)[1][1:].lower()
+    # Interned so every node of a type shares one string object
+    return sys.intern(ext) if ext else "unknown"
 
-def get_sort_key(name, parent_path):
+def get_sort_key(name, is_top_level):
     """Get sort key for a folder/file based on context."""
-    # Check if this is a top-level folder (normalize paths for comparison)
-    if str(parent_path) == str(DOCS_DIR) or os.path.samefile(parent_path, DOCS_DIR):
+    # Check if this is a top-level folder
+    if is_top_level:
         return (TOP_LEVEL_ORDER.get(name, 50), name.lower())
 
     # Check if this is a development stage folder
@@ -71,10 +130,10 @@ def get_sort_key(name, parent_path):
     if name in STUDY_CONTENT_ORDER:
         return (STUDY_CONTENT_ORDER[name], name.lower())
 
-    # For study numbers (101-SAD, 202, 301, etc.), extract the number
-    match = re.match(r'^(\d+)', name)
-    if match:
-        study_num = int(match.group(1))
+    # For study numbers (101-SAD, 202, 301, etc.), extract the number.
+    # Most names don't start with a digit, so check that before the regex.
+    if name[:1].isdecimal():
+        study_num = int(STUDY_NUM_RE.match(name).group(1))
         return (study_num, name.lower())
 
     # Default: alphabetical but after numbered items
@@ -82,14 +141,14 @@ def get_sort_key(name, parent_path):
 
 def load_metadata(path):
     """Load metadata.json from a directory if it exists."""
-    metadata_file = os.path.join(path, "metadata.json")
-    if os.path.exists(metadata_file):
-        try:
-            with open(metadata_file, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return {}
-    return {}
+    # Just try to open it; checking exists() first would add a stat.
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError.
+    try:
+        with open(os.path.join(path, "metadata.json"), "rb") as f:
+            data = f.read()
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    except (json.JSONDecodeError, IOError):
+        return {}
 
 def merge_inherited(parent_inherited, folder_meta):
     """Merge inherited properties from parent with current folder's _folder metadata."""
@@ -102,136 +161,179 @@ def merge_inherited(parent_inherited, folder_meta):
             inherited["drugName"] = folder_meta["drugName"]
     return inherited
 
-def scan_directory(path, inherited=None):
-    """Recursively scan directory and build tree structure."""
-    if inherited is None:
-        inherited = {}
-
-    items = []
+def is_within(path, ancestor):
+    """Return True if path is ancestor or lies below it."""
+    # Trailing separators so "/a/bc" is not inside "/a/b" and "/" still works
+    return os.path.join(path, "").startswith(os.path.join(ancestor, ""))
 
-    # Load metadata for this directory
-    metadata = load_metadata(path)
+def scan_folder(folder, is_top_level=False):
+    """Scan one directory into folder.items; return (subfolders, file_count)."""
+    path, rel_path, inherited, metadata, items, link_parents = folder
+    here = None  # real path of this directory, resolved on its first symlink
     folder_meta = metadata.get("_folder", {})
 
     # Update inherited properties
     current_inherited = merge_inherited(inherited, folder_meta)
 
-    try:
-        entries = os.listdir(path)
-    except PermissionError:
-        return items
-
-    # Separate folders and files, skip metadata.json
+    # Separate folders and files, skip metadata.json and junk. scandir reports the
+    # entry type from the directory listing itself (on Windows, from the
+    # FindFirstFile/FindNextFile batch), so no stat or open per entry.
+    # Avoid adding exists()/isfile() probes here for the same reason.
     folders = []
     files = []
 
-    for entry in entries:
-        if entry == "metadata.json":
-            continue
-        full_path = os.path.join(path, entry)
-        if os.path.isdir(full_path):
-            folders.append(entry)
-        else:
-            files.append(entry)
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name in IGNORED_NAMES or entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    # Follow directory symlinks (is_dir() only stats these),
+                    # except ones pointing back at this directory or one
+                    # above it, which would never terminate
+                    if entry.is_symlink():
+                        if here is None:
+                            here = os.path.realpath(path)
+                        target = os.path.realpath(entry.path)
+                        if any(is_within(p, target) for p in (here,) + link_parents):
+                            continue
+                    folders.append(entry)
+                else:
+                    files.append(entry)
+    except PermissionError:
+        return [], 0
 
     # Sort folders with custom logic, files alphabetically
-    folders.sort(key=lambda x: get_sort_key(x, path))
-    files.sort(key=lambda x: x.lower())
+    folders.sort(key=lambda x: get_sort_key(x.name, is_top_level))
+    files.sort(key=lambda x: x.name.lower())
 
     # Process folders first, then files
+    subfolders = []
+
     for entry in folders:
-        full_path = os.path.join(path, entry)
-        rel_path = os.path.relpath(full_path, DOCS_DIR.parent)
+        child_rel_path = rel_path + "/" + entry.name
 
-        # Load child folder's metadata for its title/summary
-        child_metadata = load_metadata(full_path)
+        # Load child folder's metadata for its title/summary; it is handed
+        # down with the subfolder so it is only read once
+        child_metadata = load_metadata(entry.path)
         child_folder_meta = child_metadata.get("_folder", {})
 
-        children = scan_directory(full_path, current_inherited)
-
-        item = {
-            "name": entry,
-            "type": "folder",
-            "path": rel_path,
-            "children": children
-        }
+        item = Node(entry.name, "folder", child_rel_path, [])
 
         # Add metadata if present
         if child_folder_meta.get("title"):
-            item["title"] = child_folder_meta["title"]
+            item.title = child_folder_meta["title"]
         if child_folder_meta.get("summary"):
-            item["summary"] = child_folder_meta["summary"]
+            item.summary = child_folder_meta["summary"]
 
         items.append(item)
 
-    for entry in files:
-        full_path = os.path.join(path, entry)
-        rel_path = os.path.relpath(full_path, DOCS_DIR.parent)
+        child_link_parents = link_parents
+        if entry.is_symlink():
+            child_link_parents = link_parents + (here,)
+        subfolders.append(Folder(entry.path, child_rel_path, current_inherited,
+                                 child_metadata, item.children, child_link_parents))
 
+    for entry in files:
         # Get file-specific metadata
-        file_meta = metadata.get(entry, {})
+        file_meta = metadata.get(entry.name, {})
 
-        item = {
-            "name": entry,
-            "type": get_file_type(entry),
-            "path": rel_path
-        }
+        item = Node(entry.name, get_file_type(entry.name), rel_path + "/" + entry.name)
 
         # Add metadata if present
         if file_meta.get("title"):
-            item["title"] = file_meta["title"]
+            item.title = file_meta["title"]
         if file_meta.get("summary"):
-            item["summary"] = file_meta["summary"]
+            item.summary = file_meta["summary"]
         if file_meta.get("tags"):
-            item["tags"] = file_meta["tags"]
+            item.tags = file_meta["tags"]
 
         # Add inherited properties
         if current_inherited.get("drug"):
-            item["drug"] = current_inherited["drug"]
+            item.drug = current_inherited["drug"]
 
         items.append(item)
 
-    return items
+    return subfolders, len(files)
+
+def scan_subtree(folder):
+    """Scan a Folder and everything below it; return the file count."""
+    # Explicit stack instead of recursion
+    stack = [folder]
+    file_count = 0
+
+    while stack:
+        subfolders, count = scan_folder(stack.pop())
+        stack.extend(subfolders)
+        file_count += count
+
+    return file_count
+
+def scan_directory(path, rel_path, inherited=None):
+    """Scan directory tree and build tree structure; return (items, file_count)."""
+    if inherited is None:
+        inherited = {}
+
+    items = []
+    root = Folder(path, rel_path, inherited, load_metadata(path), items, ())
+    subfolders, file_count = scan_folder(root, is_top_level=True)
+
+    # The scan is dominated by filesystem calls, which release the GIL, so
+    # each top-level subtree gets its own thread. Each fills in its own
+    # pre-placed children list, so the output order does not depend on
+    # which thread finishes first.
+    with ThreadPoolExecutor() as executor:
+        file_count += sum(executor.map(scan_subtree, subfolders))
+
+    return items, file_count
 
 def generate_markdown(node, depth=0):
     """Generate markdown representation of the TOC tree."""
+    # Explicit stack appending to one list, rather than recursing and
+    # copying each subtree's lines into its parent's
     lines = []
-    indent = "  " * depth
+    stack = [(node, depth)]
 
-    if node.get("type") == "folder":
-        title = node.get("title", node["name"])
-        summary = node.get("summary", "")
+    while stack:
+        node, depth = stack.pop()
+        indent = "  " * depth
 
-        if depth == 0:
-            lines.append(f"# {title}\n")
-        else:
-            lines.append(f"{indent}- **{title}/**")
+        # Only folders have a children list; a file's type is its extension,
+        # so "*.folder" files must not be mistaken for folders
+        if node.children is not None:
+            title = node.title or node.name
+            summary = node.summary
 
-        if summary:
-            lines.append(f"{indent}  {summary}")
+            if depth == 0:
+                lines.append(f"# {title}\n")
+            else:
+                lines.append(f"{indent}- **{title}/**")
 
-        for child in node.get("children", []):
-            lines.extend(generate_markdown(child, depth + 1))
-    else:
-        title = node.get("title", node["name"])
-        summary = node.get("summary", "")
-        drug = node.get("drug", "")
-        file_type = node.get("type", "")
-
-        # Build URL with hash for deep linking
-        url_path = node["path"].replace(" ", "%20")
-        url = f"{BASE_URL}/#{url_path}"
-
-        # Format: - [Title](url) (type) - summary
-        line = f"{indent}- [{title}]({url})"
-        if file_type:
-            line += f" ({file_type})"
-        if drug:
-            line += f" [{drug}]"
-        lines.append(line)
-
-        if summary:
-            lines.append(f"{indent}  {summary}")
+            if summary:
+                lines.append(f"{indent}  {summary}")
+
+            # Pushed in reverse so children come off the stack in order
+            stack.extend((child, depth + 1) for child in reversed(node.children))
+        else:
+            title = node.title or node.name
+            summary = node.summary
+            drug = node.drug
+            file_type = node.type
+
+            # Build URL with hash for deep linking
+            url_path = node.path.replace(" ", "%20")
+            url = f"{BASE_URL}/#{url_path}"
+
+            # Format: - [Title](url) (type) - summary
+            line = f"{indent}- [{title}]({url})"
+            if file_type:
+                line += f" ({file_type})"
+            if drug:
+                line += f" [{drug}]"
+            lines.append(line)
+
+            if summary:
+                lines.append(f"{indent}  {summary}")
 
     return lines
 
@@ -240,42 +342,77 @@ def flatten_files(node, files=None):
     if files is None:
         files = []
 
-    if node.get("type") != "folder":
-        url_path = node["path"].replace(" ", "%20")
+    if node.children is None:
+        url_path = node.path.replace(" ", "%20")
         file_entry = {
             "url": f"{BASE_URL}/#{url_path}",
-            "title": node.get("title", node["name"]),
-            "type": node.get("type", "unknown"),
-            "path": node["path"]
+            "title": node.title or node.name,
+            "type": node.type,
+            "path": node.path
         }
-        if node.get("summary"):
-            file_entry["description"] = node["summary"]
-        if node.get("drug"):
-            file_entry["drug"] = node["drug"]
-        if node.get("tags"):
-            file_entry["tags"] = node["tags"]
+        if node.summary:
+            file_entry["description"] = node.summary
+        if node.drug:
+            file_entry["drug"] = node.drug
+        if node.tags:
+            file_entry["tags"] = node.tags
         files.append(file_entry)
     else:
-        for child in node.get("children", []):
+        for child in node.children:
             flatten_files(child, files)
 
     return files
 
+def tree_to_dicts(node):
+    """Convert a Node tree to plain dicts, without recursion."""
+    root = node.to_dict()
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        if "children" in d:
+            d["children"] = [child.to_dict() for child in d["children"]]
+            stack.extend(d["children"])
+    return root
+
+def write_json(node, path):
+    """Write a folder Node and its tree as compact JSON."""
+    if orjson is not None:
+        # orjson encodes to one bytes object, so write one child subtree at a
+        # time instead of the whole file at once (stdlib json.dump already
+        # streams its output in chunks)
+        try:
+            with open(path, "wb") as f:
+                # Folder fields with "children" moved last, left open
+                fields = node.to_dict()
+                children = fields.pop("children")
+                f.write(orjson.dumps(fields)[:-1] + b',"children":[')
+                for i, child in enumerate(children):
+                    if i:
+                        f.write(b",")
+                    f.write(orjson.dumps(child, default=Node.to_dict))
+                f.write(b"]}")
+            return
+        except orjson.JSONEncodeError:
+            # orjson has a fixed nesting limit that very deep trees exceed;
+            # rewrite the partly written file with the stdlib encoder
+            pass
+
+    # Plain dicts rather than default=Node.to_dict: every default() call adds
+    # encoder frames, which would cut the depth json.dump can handle
+    with open(path, "w") as f:
+        json.dump(tree_to_dicts(node), f, separators=(",", ":"))
+
 def main():
     if not DOCS_DIR.exists():
         print(f"Error: {DOCS_DIR} does not exist")
         return
 
-    toc = {
-        "name": "Documents",
-        "type": "folder",
-        "path": "documents",
-        "children": scan_directory(DOCS_DIR)
-    }
+    # The scan works on plain str paths; Path is only used for the globals
+    children, total = scan_directory(os.fspath(DOCS_DIR), "documents")
+    toc = Node("Documents", "folder", "documents", children)
 
     # Write JSON (tree structure for UI)
-    with open(OUTPUT_JSON, "w") as f:
-        json.dump(toc, f, indent=2)
+    write_json(toc, OUTPUT_JSON)
 
     # Write Markdown (for LLM consumption)
     md_lines = [
@@ -299,19 +436,12 @@ def main():
         "## Documents",
         ""
     ]
-    for child in toc.get("children", []):
+    for child in toc.children:
         md_lines.extend(generate_markdown(child, 0))
 
     with open(OUTPUT_MD, "w") as f:
         f.write("\n".join(md_lines))
 
-    # Count files
-    def count_files(node):
-        if node.get("type") != "folder":
-            return 1
-        return sum(count_files(child) for child in node.get("children", []))
-
-    total = count_files(toc)
     print(f"Generated {OUTPUT_JSON} with {total} files")
     print(f"Generated {OUTPUT_MD}")
 
@@ -31,18 +31,35 @@ New structure:
       └── Health-Advances/
 """
 
+import errno
 import os
 import shutil
+import sys
 from pathlib import Path
 
 DOCS_DIR = Path(__file__).parent / "documents"
 DRY_RUN = False  # Set to False to actually move files
 
+# log_action lines for the current section, written out together by
+# flush_log() rather than one print() (and write() syscall) per line
+section_log = []
+
 def log_action(action, src, dst=None):
     if dst:
-        print(f"  {action}: {src} -> {dst}")
+        section_log.append(f"  {action}: {src} -> {dst}\n")
     else:
-        print(f"  {action}: {src}")
+        section_log.append(f"  {action}: {src}\n")
+
+def flush_log():
+    """Write out and clear the buffered log lines."""
+    sys.stdout.write("".join(section_log))
+    sys.stdout.flush()
+    section_log.clear()
+
+def end_section():
+    """Finish a section of output."""
+    flush_log()
+    print()
 
 def move_dir(src, dst):
     """Move a directory to a new location."""
@@ -60,30 +77,65 @@ def move_dir(src, dst):
                 if target.exists():
                     log_action("SKIP (exists)", item.relative_to(DOCS_DIR))
                 else:
-                    shutil.move(str(item), str(target))
-            # Remove empty source
-            if not any(src.iterdir()):
+                    # A plain rename is one syscall on the same filesystem;
+                    # only cross-device moves need shutil's copy + delete
+                    try:
+                        os.rename(item, target)
+                    except OSError as e:
+                        if e.errno != errno.EXDEV:
+                            raise
+                        shutil.move(str(item), str(target))
+            # Remove source if it is now empty (rmdir fails otherwise)
+            try:
                 src.rmdir()
+            except OSError:
+                pass
         else:
             shutil.move(str(src), str(dst))
         log_action("MOVED", src.relative_to(DOCS_DIR), dst.relative_to(DOCS_DIR))
     return True
 
-def remove_empty_dirs(path):
-    """Remove empty directories recursively."""
-    if not path.is_dir():
-        return
+def move_dir_fresh(src, dst):
+    """Move a directory to a destination that is not expected to exist yet."""
+    # Skip move_dir's existence checks and just rename; if dst turns out to
+    # be populated or on another filesystem, move_dir merges or copies
+    if DRY_RUN:
+        return move_dir(src, dst)
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.rename(src, dst)
+    except FileNotFoundError:
+        return False
+    except OSError:
+        return move_dir(src, dst)
+    log_action("MOVED", src.relative_to(DOCS_DIR), dst.relative_to(DOCS_DIR))
+    return True
 
-    for child in list(path.iterdir()):
-        if child.is_dir():
-            remove_empty_dirs(child)
+def list_names(path):
+    """Return the names of the entries in a directory (empty if missing)."""
+    try:
+        with os.scandir(path) as it:
+            return {entry.name for entry in it}
+    except FileNotFoundError:
+        return set()
 
-    if path.is_dir() and not any(path.iterdir()):
+def remove_empty_dirs(path):
+    """Remove empty directories recursively."""
+    # Bottom-up walk, so children are removed before their parents
+    for dirpath, dirnames, filenames in os.walk(path, topdown=False):
         if DRY_RUN:
-            log_action("REMOVE (empty)", path.relative_to(DOCS_DIR))
-        else:
-            path.rmdir()
-            log_action("REMOVED (empty)", path.relative_to(DOCS_DIR))
+            # Nothing is removed, so only already-empty directories would go
+            if not dirnames and not filenames:
+                log_action("REMOVE (empty)", Path(dirpath).relative_to(DOCS_DIR))
+            continue
+
+        # rmdir refuses non-empty directories, so there is no need to look first
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            continue
+        log_action("REMOVED (empty)", Path(dirpath).relative_to(DOCS_DIR))
 
 def reorganize():
     print("=" * 60)
@@ -125,12 +177,17 @@ def reorganize():
         "346 Investigators Brochure": "Investigators-Brochure",
     }
 
+    # List the backup folder once instead of probing every source path
+    alln346_backup_names = list_names(alln346_backup)
+
     for src_name, dst_name in study_mapping_346.items():
+        if src_name not in alln346_backup_names:
+            continue
         src = alln346_backup / src_name
         dst = alln346_clinical / dst_name
-        move_dir(src, dst)
+        move_dir_fresh(src, dst)
 
-    print()
+    end_section()
 
     # =========================================
     # 2. ALLN-177 / RELOXALIASE REORGANIZATION
@@ -169,10 +226,14 @@ def reorganize():
         "713 final TLFs": "713/TLFs",
     }
 
+    relox_backup_names = list_names(relox_backup)
+
     for src_name, dst_name in study_mapping_relox.items():
+        if src_name not in relox_backup_names:
+            continue
         src = relox_backup / src_name
         dst = relox_clinical / dst_name
-        move_dir(src, dst)
+        move_dir_fresh(src, dst)
 
     # Move loose files from Back-up/Reloxaliase
     if relox_backup.exists():
@@ -200,7 +261,7 @@ def reorganize():
             else:
                 move_dir(item, relox_new / "Medpace-Data-2024" / item.name)
 
-    print()
+    end_section()
 
     # =========================================
     # 3. SUPPORTING DOCUMENTS
@@ -217,7 +278,7 @@ def reorganize():
     if health_advances_backup.exists():
         move_dir(health_advances_backup, supporting / "Health-Advances-Backup")
 
-    print()
+    end_section()
 
     # =========================================
     # 4. CLEANUP
@@ -240,7 +301,7 @@ def reorganize():
             dst.parent.mkdir(parents=True, exist_ok=True)
             shutil.move(str(root_xlsx), str(dst))
 
-    print()
+    end_section()
     print("=" * 60)
     if DRY_RUN:
         print("DRY RUN COMPLETE - No changes made")
@@ -251,4 +312,8 @@ def reorganize():
     print("=" * 60)
 
 if __name__ == "__main__":
-    reorganize()
+    try:
+        reorganize()
+    finally:
+        # Report the moves already made even if one of them failed
+        flush_log()